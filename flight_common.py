@@ -0,0 +1,271 @@
+"""Shared FlightAware lookup: logging, HTTP client, models and the FastMCP tool."""
+
+import os
+from dotenv import load_dotenv
+from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel
+import httpx
+import msgspec
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+import time
+import urllib.parse
+import urllib.request
+from typing import Optional
+
+# to use Google Colab Secrets
+# from google.colab import userdata
+
+# Configure logging to write to a file and console from a background thread,
+# so log calls in the async handlers only enqueue the record
+_file_handler = logging.FileHandler("app.log")
+_console_handler = logging.StreamHandler()
+_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+for _handler in (_file_handler, _console_handler):
+    _handler.setFormatter(_formatter)
+
+log_queue = queue.Queue(maxsize=10000)
+queue_listener = logging.handlers.QueueListener(log_queue, _file_handler, _console_handler)
+queue_listener.start()
+atexit.register(queue_listener.stop)
+
+# The queue handler only merges the message args; timestamps and levels are
+# formatted by the listener's handlers
+_queue_handler = logging.handlers.QueueHandler(log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+logging.basicConfig(
+    level=logging.INFO,
+    handlers=[_queue_handler]
+)
+logger = logging.getLogger(__name__)
+
+# Load environment variables from .env file
+load_dotenv()
+
+# FlightAware API base URL and headers
+FLIGHTAWARE_BASE_URL = "https://aeroapi.flightaware.com/aeroapi/flights/"
+
+# Resolve the API key once at startup so a missing key fails immediately
+_API_KEY = os.getenv("FLIGHTAWARE_API_KEY")
+# _API_KEY = userdata.get('FLIGHTAWARE_API_KEY')
+if not _API_KEY:
+    logger.error("API key is missing")
+    raise RuntimeError("API key is missing: set FLIGHTAWARE_API_KEY in the environment or .env file")
+
+def _environment_proxy() -> Optional[str]:
+    """Return the proxy for FlightAware from HTTPS_PROXY/ALL_PROXY, or None if NO_PROXY exempts it."""
+    if urllib.request.proxy_bypass(urllib.parse.urlsplit(FLIGHTAWARE_BASE_URL).hostname):
+        return None
+    proxies = urllib.request.getproxies()
+    proxy = proxies.get("https") or proxies.get("all")
+    if proxy and "://" not in proxy:
+        proxy = f"http://{proxy}"
+    return proxy or None
+
+# Shared client so repeat lookups reuse a warm keep-alive (HTTP/2) connection;
+# the transport retries failed connection attempts and the timeouts bound
+# how long a slow FlightAware can hold a request. Passing transport= turns off
+# httpx's own environment proxy lookup, so the proxy is resolved above.
+_client = httpx.AsyncClient(
+    base_url=FLIGHTAWARE_BASE_URL,
+    headers={"x-apikey": _API_KEY},
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0),
+        proxy=_environment_proxy()
+    ),
+    timeout=httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
+)
+
+class _CircuitBreaker:
+    """Fail fast once FlightAware has failed fail_max times in a row.
+
+    After reset_timeout seconds a single probe request is let through while
+    every other caller keeps failing fast; the probe's success closes the
+    breaker and its failure re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        # Half-open: this caller becomes the probe
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+_breaker = _CircuitBreaker(fail_max=5, reset_timeout=30.0)
+
+class FlightSearchRequest(BaseModel):
+    flight_number: str
+
+class FlightInfoResponse(BaseModel):
+    flight_number: Optional[str] = None
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    departure_time: Optional[str] = None
+    arrival_time: Optional[str] = None
+
+class FlightSearchErrorResponse(BaseModel):
+    error: str
+
+# Typed view of the parts of the FlightAware response that we read; the
+# MCP-facing models above stay Pydantic since FastMCP builds the tool schema
+# from them
+class _Airport(msgspec.Struct):
+    code: Optional[str] = None
+
+class _FlightTime(msgspec.Struct):
+    date: Optional[str] = None
+
+class _FlightRecord(msgspec.Struct, rename={"flight_number": "ident"}):
+    flight_number: Optional[str] = None
+    origin: Optional[_Airport] = None
+    destination: Optional[_Airport] = None
+    actual_departure_time: Optional[_FlightTime] = None
+    actual_arrival_time: Optional[_FlightTime] = None
+
+class _FlightAwarePayload(msgspec.Struct):
+    flights: list[_FlightRecord] = []
+
+# Built once so each response is decoded without re-resolving the type tree
+_payload_decoder = msgspec.json.Decoder(_FlightAwarePayload)
+
+# Flight identifiers accepted before going to the network, e.g. UAL123
+_FLIGHT_RE = re.compile(r"\A[A-Z0-9]{2,8}\Z")
+
+# Recent successful lookups, keyed by the requested flight number
+_CACHE_TTL = 60.0
+_CACHE_MAXSIZE = 1024
+_cache: dict[str, tuple[float, FlightInfoResponse]] = {}
+
+# FlightAware calls currently in progress, keyed by the requested flight number
+_inflight: dict[str, asyncio.Task[FlightInfoResponse | FlightSearchErrorResponse]] = {}
+
+# Initialize FastMCP server
+app = FastMCP()
+
+async def _fetch_flight(
+    flight_number: str
+) -> FlightInfoResponse | FlightSearchErrorResponse:
+    cache_key = flight_number
+
+    if not _breaker.allow():
+        logger.error("FlightAware circuit breaker is open, skipping request")
+        return FlightSearchErrorResponse(error="FlightAware API is temporarily unavailable")
+
+    logger.info(f"Making request for flight {flight_number}")
+
+    # Relative to the client's pre-parsed base URL
+    try:
+        response = await _client.get(flight_number)
+    except httpx.TransportError as e:
+        _breaker.record_failure()
+        logger.error(f"FlightAware request failed: {e!r}")
+        return FlightSearchErrorResponse(error=f"FlightAware request failed: {type(e).__name__}")
+    except BaseException:
+        # Count anything else, including cancellation, so a probe is never left pending
+        _breaker.record_failure()
+        raise
+
+    logger.info(f"Response status code: {response.status_code}")
+
+    # Server errors count towards opening the breaker; anything else means
+    # FlightAware is up
+    if response.status_code >= 500:
+        _breaker.record_failure()
+    else:
+        _breaker.record_success()
+
+    # Work from the raw bytes; only the error path decodes them to text
+    body = response.content
+
+    if response.status_code != 200:
+        error_text = body.decode(response.encoding or "utf-8", errors="replace")
+        logger.error(f"FlightAware API error: {response.status_code} - {error_text}")
+        return FlightSearchErrorResponse(error=f"FlightAware API error: {response.status_code} - {error_text}")
+
+    # Decode straight into the typed payload, skipping fields we don't use
+    try:
+        payload = _payload_decoder.decode(body)
+    except msgspec.DecodeError as e:
+        logger.error(f"Unexpected FlightAware response: {e}")
+        return FlightSearchErrorResponse(error="Unexpected response from FlightAware")
+
+    # Check that the response contains at least one flight
+    if not payload.flights:
+        logger.error("No flight information found in the response")
+        return FlightSearchErrorResponse(error="No flight information found")
+
+    # The record's fields are all Optional[str], as are the model's, so
+    # model_construct can skip re-validation
+    flight_info = payload.flights[0]
+    flight_response = FlightInfoResponse.model_construct(
+        flight_number=flight_info.flight_number,
+        origin=flight_info.origin and flight_info.origin.code,
+        destination=flight_info.destination and flight_info.destination.code,
+        departure_time=flight_info.actual_departure_time and flight_info.actual_departure_time.date,
+        arrival_time=flight_info.actual_arrival_time and flight_info.actual_arrival_time.date
+    )
+
+    # Cache the successful lookup, evicting the oldest entry once full
+    _cache.pop(cache_key, None)
+    _cache[cache_key] = (time.monotonic(), flight_response)
+    if len(_cache) > _CACHE_MAXSIZE:
+        del _cache[next(iter(_cache))]
+
+    return flight_response
+
+# Break the long line into multiple lines
+@app.tool("/search_flight")
+async def search_flight(
+    request: FlightSearchRequest
+) -> FlightInfoResponse | FlightSearchErrorResponse:
+    # Reject malformed identifiers without a round-trip to FlightAware
+    flight_number = request.flight_number.strip().upper()
+    if not _FLIGHT_RE.match(flight_number):
+        logger.error(f"Invalid flight number: {request.flight_number!r}")
+        return FlightSearchErrorResponse(error="Invalid flight number")
+
+    # Serve repeat lookups from the cache without touching the network
+    cached = _cache.get(flight_number)
+    if cached is not None and time.monotonic() - cached[0] < _CACHE_TTL:
+        return cached[1]
+
+    # Share one FlightAware call between concurrent lookups of the same flight
+    task = _inflight.get(flight_number)
+    if task is None:
+        task = asyncio.create_task(_fetch_flight(flight_number))
+        _inflight[flight_number] = task
+        task.add_done_callback(lambda _: _inflight.pop(flight_number, None))
+
+    # Shield the shared call so a cancelled caller does not cancel it for the rest
+    return await asyncio.shield(task)
+
+async def close_client() -> None:
+    """Close the shared FlightAware connection pool."""
+    await _client.aclose()